@@ -16,31 +16,65 @@ Script for generating latex from doxygen-generated xml files.
 The generatetd latex files are compatible with the seL4 manual.
 """
 import argparse
+import functools
+import hashlib
+import json
+import multiprocessing
 import sys
 import os
 import re
-from bs4 import BeautifulSoup
-import six
+import shutil
+from lxml import etree
+
+def compile_escape_patterns(patterns):
+    """
+    Return a regex matching any key of an escape pattern dict, or
+    None if there is nothing to escape
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(map(re.escape, patterns)))
+
+def compile_escape_table(patterns):
+    """
+    Return a str.translate table for an escape pattern dict, or None
+    if any of the patterns is longer than a single character
+    """
+    if any(len(key) != 1 for key in patterns):
+        return None
+    return str.maketrans(patterns)
 
 class Generator(object):
     # Dict mapping characters to their escape sequence in latex
     ESCAPE_PATTERNS = {}
+    # Regex and translation table for ESCAPE_PATTERNS, built once per class
+    ESCAPE_REGEX = compile_escape_patterns(ESCAPE_PATTERNS)
+    ESCAPE_TABLE = compile_escape_table(ESCAPE_PATTERNS)
+
+    __slots__ = ('_parse_table', '_parse_table_noref')
+
+    def __init__(self):
+        # the parse table is consulted for every node, so only build it once
+        self._parse_table = self.get_parse_table()
+        # without a ref dict, refs can be dropped without looking at them
+        self._parse_table_noref = dict(self._parse_table,
+                                       ref=self.ignore_ref, nameref=self.ignore_ref)
 
     def get_parse_table(self):
         # table of translations of xml children of 'para' elements
         parse_table = {
             'para'          : self.parse_recurse,
-            'computeroutput': lambda p, r: '%s' % self.get_text(p),
-            'texttt'        : lambda p, r: '%s' % self.get_text(p['text']),
+            'computeroutput': self.parse_computeroutput,
+            'texttt'        : self.parse_texttt,
             'ref'           : self.ref_to_format,
             'nameref'       : self.nref_to_format,
-            'shortref'      : lambda p, r: "%s" % p['sec'],
-            'obj'           : lambda p, r: "%s" % p['name'],
-            'errorenumdesc' : lambda p, r: "",
+            'shortref'      : self.parse_shortref,
+            'obj'           : self.parse_obj,
+            'errorenumdesc' : self.parse_errorenumdesc,
             'orderedlist'   : self.parse_ordered_list,
-            'listitem'      : lambda p, r: self.parse_para(p.para, r),
+            'listitem'      : self.parse_listitem,
             'itemizedlist'  : self.parse_itemized_list,
-            'autoref'       : lambda p, r: "%s" % p['label'],
+            'autoref'       : self.parse_autoref,
         }
         return parse_table
 
@@ -56,8 +90,13 @@ class Generator(object):
         """
         Return a string with latex special characters escaped
         """
-        escape_regex = re.compile('|'.join(self.ESCAPE_PATTERNS.keys()))
-        return escape_regex.sub(lambda p: self.ESCAPE_PATTERNS[p.group()], string)
+        if self.ESCAPE_TABLE is not None:
+            return string.translate(self.ESCAPE_TABLE)
+        return self.ESCAPE_REGEX.sub(self.escape_match, string)
+
+    def escape_match(self, match):
+        """Return the escape sequence for a match of ESCAPE_REGEX"""
+        return self.ESCAPE_PATTERNS[match.group()]
 
     def get_text(self, soup, escape=True):
         """
@@ -68,18 +107,15 @@ class Generator(object):
 
         if isinstance(soup, str):
             string = soup
-        elif isinstance(soup, six.string_types):
-            string = str(soup)
-        elif soup.string:
-            string = str(soup.string)
+        elif len(soup):
+            string = "".join(soup.itertext())
         else:
-            string = soup.get_text()
+            # no children, so the text is all there is
+            string = soup.text or ""
 
-        if string is not None:
-            if escape:
-                return self.text_escape(string)
-            else:
-                return string
+        if escape:
+            return self.text_escape(string)
+        return string
 
     def ref_format(self, refid, ref_dict):
         """Lookup refid in ref_dict and output the latex for an apifunc ref"""
@@ -88,13 +124,17 @@ class Generator(object):
     def ref_to_format(self, para, ref_dict):
         """Convert a reference by id to a latex command by looking up refid in para"""
         if len(ref_dict) > 0:
-            return self.ref_format(para["refid"], ref_dict)
+            return self.ref_format(para.get("refid"), ref_dict)
         return ""
 
     def nref_to_format(self, para, ref_dict):
         """Convert a reference by name to a latex command by looking up refid in para"""
         if len(ref_dict) > 0:
-            return self.ref_format(para["name"], ref_dict)
+            return self.ref_format(para.get("name"), ref_dict)
+        return ""
+
+    def ignore_ref(self, para, ref_dict):
+        """Drop a reference when there is no ref dict to resolve it with"""
         return ""
 
     def parse_list(self, para, ref_dict, tag):
@@ -108,85 +148,150 @@ class Generator(object):
         """itemizedlist --> itemize"""
         return self.parse_list(para, ref_dict, 'itemize')
 
-    def parse_recurse(self, para, ref_dict):
-        """Recursively parse a para element"""
-        # recurse on the contents
-        output = ""
-        for item in para.contents:
-            output += self.parse_para(item, ref_dict)
-        return output
+    def parse_computeroutput(self, para, ref_dict):
+        return self.get_text(para)
+
+    def parse_texttt(self, para, ref_dict):
+        return self.text_escape(para.get('text'))
+
+    def parse_shortref(self, para, ref_dict):
+        return para.get('sec')
+
+    def parse_obj(self, para, ref_dict):
+        return para.get('name')
+
+    def parse_errorenumdesc(self, para, ref_dict):
+        return ""
 
-    def parse_para(self, para_node, ref_dict={}):
+    def parse_listitem(self, para, ref_dict):
+        return self.parse_para(para.find('para'), ref_dict)
+
+    def parse_autoref(self, para, ref_dict):
+        return para.get('label')
+
+    def parse_recurse(self, para, ref_dict, out_parts=None):
+        """
+        Parse the contents of a para element. Nested para elements are
+        walked with an explicit stack rather than by recursing. If
+        out_parts is given the output fragments are appended to it,
+        otherwise they are joined and returned.
+        """
+        parse_table = self._parse_table if ref_dict else self._parse_table_noref
+        # text nodes are an element's text and the tail of each child element
+        parts = [] if out_parts is None else out_parts
+        if para.text:
+            parts.append(self.text_escape(para.text))
+        # stack of (child iterator, tail to emit once the children are done)
+        stack = [(iter(para), None)]
+        while stack:
+            children, tail = stack[-1]
+            for item in children:
+                if item.tag == 'para':
+                    if item.text:
+                        parts.append(self.text_escape(item.text))
+                    stack.append((iter(item), item.tail))
+                    break
+                parse_fn = parse_table.get(item.tag)
+                if parse_fn is not None:
+                    parts.append(parse_fn(item, ref_dict))
+                if item.tail:
+                    parts.append(self.text_escape(item.tail))
+            else:
+                stack.pop()
+                if tail:
+                    parts.append(self.text_escape(tail))
+        if out_parts is None:
+            return "".join(parts)
+
+    def parse_para(self, para_node, ref_dict={}, out_parts=None):
         """
         Parse a paragraph node, handling special doxygen node types
         that may appear inside a paragraph. Unhandled cases are
-        not parsed and result in an empty string.
+        not parsed and result in an empty string. If out_parts is
+        given the output is appended to it instead of being returned.
         """
-        parse_table = self.get_parse_table()
-        if para_node.name is None:
-            return self.get_text(para_node, escape=True)
-        elif para_node.name in parse_table:
-            return parse_table[para_node.name](para_node, ref_dict)
-        else:
-            return ""
+        if out_parts is not None and para_node.tag == 'para':
+            # skip building an intermediate string for the paragraph
+            self.parse_recurse(para_node, ref_dict, out_parts)
+            return
+        parse_table = self._parse_table if ref_dict else self._parse_table_noref
+        parse_fn = parse_table.get(para_node.tag)
+        output = "" if parse_fn is None else parse_fn(para_node, ref_dict)
+        if out_parts is None:
+            return output
+        out_parts.append(output)
 
     def parse_brief(self, parent):
         """
         Parse the "brief description" section of a doxygen member.
         """
-        para_nodes = parent.find('briefdescription').find_all('para')
-        return "\n\n".join([self.parse_para(n) for n in para_nodes])
+        brief = parent.find('briefdescription')
+        if brief is None:
+            return ""
+        # empty paragraphs are dropped, so a brief with no text is empty
+        paras = (self.parse_para(n) for n in brief.iter('para'))
+        return "\n\n".join(p for p in paras if p)
 
     def parse_detailed_desc(self, parent, ref_dict):
         """
         Parse the "detailed description" section of a doxygen member.
         """
-        # parse the function parameters
+        # collect the nodes of interest in a single walk of the member
+        nodes = {'type': [], 'declname': [], 'parameteritem': [], 'simplesect': []}
+        for node in parent.iter(*nodes):
+            nodes[node.tag].append(node)
+
+        # parse the function parameters, each param's info holds the
+        # final, escaped text for its type, name and description
         params = {}
         param_order = []
-        types_iter = iter(parent.find_all('type'))
-        names = parent.find_all('declname')
+        types_iter = iter(nodes['type'])
+        names = nodes['declname']
+        no_desc = self.todo_if_empty("")
 
         # the first type is the return type
-        ret_type = six.next(types_iter)
+        ret_type = next(types_iter)
 
         # the rest are parameters
         for n in names:
-            param_type = six.next(types_iter).text
+            param_type = self.get_text(next(types_iter), escape=False)
             if param_type == "void":
                 continue
-            params[str(n.text)] = {"type": param_type}
-            param_order.append(str(n.text))
+            params[n.text] = {
+                "type": self.text_escape(param_type),
+                "name": self.text_escape(n.text),
+                "desc": no_desc,
+            }
+            param_order.append(n.text)
 
-        param_items = parent.find_all("parameteritem")
+        param_items = nodes["parameteritem"]
         for param_item in param_items:
-            param_name_node = param_item.find("parametername")
+            param_name_node = param_item.find(".//parametername")
             param_desc_node = param_item.find("parameterdescription")
 
             param_name = self.get_text(param_name_node, escape=False)
             param_desc = self.parse_para(param_desc_node.find('para'), ref_dict)
 
-            params[param_name]["desc"] = param_desc
+            params[param_name]["desc"] = self.todo_if_empty(param_desc.strip())
 
         if len(params) == 0:
             params_str = self.generate_empty_param_string()
         else:
-            params_str = ""
-            for param_name in param_order:
-                param_info = params[param_name]
-                params_str += self.generate_param_string(param_info, param_name)
+            params_str = "".join(self.generate_param_string(params[param_name], param_name)
+                                 for param_name in param_order)
 
-        details = ""
-        for n in parent.detaileddescription.find_all('para', recursive=False):
-            if not n.parameterlist:
-                details += self.parse_para(n, ref_dict)
-                details += "\n\n"
+        details_parts = []
+        for n in parent.find('detaileddescription').iterchildren('para'):
+            if n.find('.//parameterlist') is None:
+                self.parse_para(n, ref_dict, details_parts)
+                details_parts.append("\n\n")
+        details = "".join(details_parts)
 
         ret_str = self.get_text(ret_type, escape=False)
         ret = self.default_return_doc(ret_str.split()[-1])
-        simplesects = parent.find_all("simplesect")
+        simplesects = nodes["simplesect"]
         for n in simplesects:
-            if n['kind'] == "return":
+            if n.get('kind') == "return":
                 ret = self.parse_para(n.find('para'), ref_dict)
                 break
         return (self.todo_if_empty(details.strip()), params_str, self.todo_if_empty(ret.strip()))
@@ -196,8 +301,8 @@ class Generator(object):
         Extract a function prototype from a doxygen member.
         """
 
-        inline = parent["inline"] == "yes"
-        static = parent["static"] == "yes"
+        inline = parent.get("inline") == "yes"
+        static = parent.get("static") == "yes"
         ret_type = self.get_text(parent.find("type"))
         name = self.get_text(parent.find("name"))
 
@@ -209,17 +314,20 @@ class Generator(object):
 
         return output
 
-    def build_ref_dict(self, soup):
+    def build_ref_dict(self, members):
         """
         Return a dict mapping reference ids and reference names
-        to details about the referee.
+        to details about the referee, given an iterable of
+        (ref_id, name, label) tuples for each member.
         """
 
         ret = {}
-        for member in soup.find_all("memberdef"):
-            name = str(member.find('name').string)
-            label = member.manual['label']
-            ref_id = member['id']
+        for ref_id, name, label in members:
+            # names and ids are looked up for every ref, intern them to
+            # make the dict probes cheaper
+            ref_id = sys.intern(ref_id)
+            name = sys.intern(name)
+            label = sys.intern(label)
             data = {
                 "name": self.text_escape(name),
                 "label": label,
@@ -256,17 +364,10 @@ class LatexGenerator(Generator):
     ESCAPE_PATTERNS = {
         "_": "\\_",
     }
+    ESCAPE_REGEX = compile_escape_patterns(ESCAPE_PATTERNS)
+    ESCAPE_TABLE = compile_escape_table(ESCAPE_PATTERNS)
 
-    def get_parse_table(self):
-        parse_table = super(LatexGenerator, self).get_parse_table()
-        parse_table['computeroutput'] = lambda p, r: '\\texttt{%s}' % self.get_text(p)
-        parse_table['texttt'] = lambda p, r: '\\texttt{%s}' % self.get_text(p['text'])
-        parse_table['shortref'] =  lambda p, r: "\\ref{sec:%s}" % p['sec']
-        parse_table['obj'] = lambda p, r: "\\obj{%s}" % p['name']
-        parse_table['errorenumdesc'] = lambda p, r: "\\errorenumdesc"
-        parse_table['listitem'] = lambda p, r: "\\item " + self.parse_para(p.para, r) + "\n"
-        parse_table['autoref'] = lambda p, r: "\\autoref{%s}" % p['label']
-        return parse_table
+    __slots__ = ()
 
     def default_return_doc(self, ret_type):
         """
@@ -282,92 +383,243 @@ class LatexGenerator(Generator):
         """Lookup refid in ref_dict and output the latex for an apifunc ref"""
 
         ref = ref_dict[refid]
-        return "\\apifunc{%(name)s}{%(label)s}" % ref
+        return self.apifunc(ref["name"], ref["label"])
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def apifunc(name, label):
+        """
+        Return the latex for an apifunc ref. The same functions are
+        referenced many times, so results are cached by (name, label).
+        """
+        return "\\apifunc{%s}{%s}" % (name, label)
+
+    def parse_computeroutput(self, para, ref_dict):
+        return '\\texttt{%s}' % self.get_text(para)
+
+    def parse_texttt(self, para, ref_dict):
+        return '\\texttt{%s}' % self.text_escape(para.get('text'))
+
+    def parse_shortref(self, para, ref_dict):
+        return "\\ref{sec:%s}" % para.get('sec')
+
+    def parse_obj(self, para, ref_dict):
+        return "\\obj{%s}" % para.get('name')
+
+    def parse_errorenumdesc(self, para, ref_dict):
+        return "\\errorenumdesc"
+
+    def parse_listitem(self, para, ref_dict):
+        return "\\item " + self.parse_para(para.find('para'), ref_dict) + "\n"
+
+    def parse_autoref(self, para, ref_dict):
+        return "\\autoref{%s}" % para.get('label')
 
     def parse_list(self, para, ref_dict, tag):
         """Parse an ordered list element"""
 
-        output = '\\begin{%s}\n' % tag
-        for item in para.contents:
-            output += self.parse_para(item, ref_dict)
-        output += '\\end{%s}\n' % tag
-        return output
+        return '\\begin{%s}\n%s\\end{%s}\n' % (tag, self.parse_recurse(para, ref_dict), tag)
 
     def todo_if_empty(self, s):
         return s if s else "\\todo"
 
     def generate_param_string(self, param_info, param_name):
-        return "\\param{%(type)s}{%(name)s}{%(desc)s}\n" % {
-                    "type": self.get_text(param_info["type"]),
-                    "name": self.get_text(param_name),
-                    "desc": self.todo_if_empty(param_info.get("desc", "").strip()),
-        }
+        return f"\\param{{{param_info['type']}}}{{{param_info['name']}}}{{{param_info['desc']}}}\n"
 
     def generate_empty_param_string(self):
         return "\\param{void}{}{}"
 
     def generate_api_doc(self, level, member, params, ret, details):
-        manual_node = member.manual
-        return """
+        manual_node = member.find('.//manual')
+        label = manual_node.get("label")
+        name = self.text_escape(manual_node.get("name"))
+        brief = self.todo_if_empty(self.parse_brief(member))
+        prototype = self.parse_prototype(member)
+        return f"""
 \\apidoc
-[{%(level)s}]
-{%(label)s}
-{%(name)s}
-{%(brief)s}
-{%(prototype)s}
-{%(params)s}
-{%(ret)s}
-{%(details)s}
-        """ % {
-            "level": level,
-            "label": manual_node["label"],
-            "name": self.text_escape(manual_node["name"]),
-            "brief": self.todo_if_empty(self.parse_brief(member)),
-            "prototype": self.parse_prototype(member),
-            "params": params,
-            "ret": ret,
-            "details": details,
-        }
+[{{{level}}}]
+{{{label}}}
+{{{name}}}
+{{{brief}}}
+{{{prototype}}}
+{{{params}}}
+{{{ret}}}
+{{{details}}}
+        """
 
-def generate_general_syscall_doc(generator, input_file_name, level):
+class MemberScanner(object):
     """
-    Takes a path to a file containing doxygen-generated xml,
-    and return a string containing latex suitable for inclusion
-    in the sel4 manual.
+    An lxml parser target for the first pass over a doxygen xml file.
+    It receives SAX style events and records the id, name and manual
+    label of every memberdef without building a tree. Elements are only
+    built for the top level detailed descriptions.
     """
 
-    with open(input_file_name, "r") as f:
-        output = ""
-        soup = BeautifulSoup(f, "lxml")
-        ref_dict = generator.build_ref_dict(soup)
-        elements = soup.find_all("memberdef")
-        summary = soup.find('compounddef')
-        # parse any top level descriptions
-        for ddesc in summary.find_all('detaileddescription', recursive=False):
-            if ddesc.para:
-                output += generator.parse_para(ddesc.para)
-
-        # parse all of the function definitions
-        if len(elements) == 0:
-            return "No methods."
-
-        for member in elements:
-            manual_node = member.manual
-            details, params, ret = generator.parse_detailed_desc(member, ref_dict)
-            output += generator.generate_api_doc(level, member, params, ret, details)
-        return output
+    def __init__(self):
+        # (ref_id, name, label) for each memberdef
+        self.members = []
+        # detaileddescription elements of the compounddef
+        self.descriptions = []
+        # tags of the currently open elements
+        self.stack = []
+        # [ref_id, name, label] of the memberdef being scanned
+        self.member = None
+        # text of the member's name, while inside it
+        self.name_text = None
+        # tree builder for a top level description, while inside it
+        self.builder = None
+        self.builder_depth = 0
+
+    def start(self, tag, attrib):
+        parent = self.stack[-1] if self.stack else None
+        self.stack.append(tag)
+        if self.builder is not None:
+            self.builder.start(tag, attrib)
+        elif tag == "memberdef":
+            self.member = [attrib.get("id"), None, None]
+        elif self.member is not None:
+            if tag == "name" and parent == "memberdef":
+                self.name_text = []
+            elif tag == "manual" and self.member[2] is None:
+                self.member[2] = attrib.get("label")
+        elif tag == "detaileddescription" and parent == "compounddef":
+            self.builder = etree.TreeBuilder()
+            self.builder_depth = len(self.stack)
+            self.builder.start(tag, attrib)
+
+    def end(self, tag):
+        if self.builder is not None:
+            self.builder.end(tag)
+            if len(self.stack) == self.builder_depth:
+                self.descriptions.append(self.builder.close())
+                self.builder = None
+        elif tag == "memberdef":
+            self.members.append(tuple(self.member))
+            self.member = None
+        elif tag == "name" and self.name_text is not None:
+            self.member[1] = "".join(self.name_text)
+            self.name_text = None
+        self.stack.pop()
+
+    def data(self, data):
+        if self.builder is not None:
+            self.builder.data(data)
+        elif self.name_text is not None:
+            self.name_text.append(data)
+
+    def close(self):
+        return self
+
+def clear_element(elem):
+    """Free an element produced by iterparse, along with its earlier siblings"""
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+def iter_members(input_file_name):
+    """
+    Yield each memberdef element of a doxygen xml file as soon as it has
+    been parsed, freeing it once the caller moves on so that only one
+    member is held in memory at a time.
+    """
+
+    for _, elem in etree.iterparse(input_file_name, tag="memberdef"):
+        yield elem
+        clear_element(elem)
+
+def generate_general_syscall_doc(generator, input_file_name, level, out_fh):
+    """
+    Takes a path to a file containing doxygen-generated xml, and
+    writes latex suitable for inclusion in the sel4 manual to out_fh
+    as each member is generated.
+    """
+
+    # The input is read twice. Refs may point forward, so the first pass
+    # scans every member for the ref dict before any member is parsed.
+    # Doxygen puts the top level description after the members, so it
+    # is collected in the first pass too.
+    scanner = etree.parse(input_file_name, etree.XMLParser(target=MemberScanner()))
+    ref_dict = generator.build_ref_dict(scanner.members)
+
+    if len(ref_dict) == 0:
+        out_fh.write("No methods.")
+        return
+
+    # parse any top level descriptions
+    for ddesc in scanner.descriptions:
+        para = ddesc.find('para')
+        if para is not None:
+            out_fh.write(generator.parse_para(para))
+
+    # parse all of the function definitions
+    for member in iter_members(input_file_name):
+        details, params, ret = generator.parse_detailed_desc(member, ref_dict)
+        out_fh.write(generator.generate_api_doc(level, member, params, ret, details))
+
+def cache_key(input_file_name, level):
+    """
+    Return a fingerprint of everything that determines the latex
+    generated from an input file. Doxygen rewrites all of its xml on
+    every run, so the input is identified by its contents rather than
+    its mtime. This script's own mtime invalidates stale entries.
+    """
+
+    with open(input_file_name, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return [digest, level, os.path.getmtime(__file__)]
+
+def cache_is_valid(cache_base, key):
+    """Return whether the latex cached at cache_base was generated for key"""
+
+    try:
+        with open(cache_base + ".json", "r") as f:
+            cached = json.load(f)
+    except (IOError, ValueError):
+        return False
+    return cached.get("key") == key and os.path.exists(cache_base + ".tex")
+
+def write_cache(cache_base, key, output_file_name):
+    """Store a copy of the latex generated for key at cache_base"""
+
+    shutil.copyfile(output_file_name, cache_base + ".tex")
+    with open(cache_base + ".json", "w") as f:
+        json.dump({"key": key}, f)
+
+def render_file(input_file_name, output_file_name, level, cache_dir=None):
+    """
+    Convert a single doxygen xml file into latex, reusing the output
+    cached in cache_dir if the input has not changed.
+    """
+
+    if cache_dir:
+        cache_base = os.path.join(cache_dir, os.path.basename(input_file_name))
+        key = cache_key(input_file_name, level)
+        if cache_is_valid(cache_base, key):
+            shutil.copyfile(cache_base + ".tex", output_file_name)
+            return
+
+    generator = LatexGenerator()
+    with open(output_file_name, "w") as output_file:
+        generate_general_syscall_doc(generator, input_file_name, level, output_file)
+
+    if cache_dir:
+        write_cache(cache_base, key, output_file_name)
 
 def process_args():
     """Process script arguments"""
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("-i", "--input", dest="input", type=str,
-                        help="File containing doxygen-generated xml.")
+    parser.add_argument("-i", "--input", dest="input", type=str, nargs="+",
+                        help="Files containing doxygen-generated xml.")
     parser.add_argument("-o", "--output", dest="output", type=str,
-                        help="Output latex file.")
+                        help="Output latex file, or output directory if "
+                             "there are several input files.")
 
     parser.add_argument("-l", "--level", choices=["subsection", "subsubsection"],
                         help="LaTeX section level for each method")
+    parser.add_argument("--cache-dir", dest="cache_dir", type=str,
+                        help="Directory in which to cache generated latex, "
+                             "unchanged inputs are not parsed again.")
 
     return parser
 
@@ -375,15 +627,28 @@ def main():
     """Convert doxygen xml into a seL4 API LaTeX manual format"""
     args = process_args().parse_args()
 
-    if not os.path.exists(os.path.dirname(args.output)):
-        os.makedirs(os.path.dirname(args.output))
-
-    generator = LatexGenerator()
-
-    output_str = generate_general_syscall_doc(generator, args.input, args.level)
-
-    with open(args.output, "w") as output_file:
-        output_file.write(output_str)
+    if len(args.input) == 1:
+        outputs = [args.output]
+    else:
+        # each input file gets a latex file of the same name in the output directory
+        outputs = [os.path.join(args.output, os.path.splitext(os.path.basename(i))[0] + ".tex")
+                   for i in args.input]
+
+    for d in set(os.path.dirname(o) for o in outputs) | set([args.cache_dir]):
+        if d and not os.path.exists(d):
+            os.makedirs(d)
+
+    jobs = [(i, o, args.level, args.cache_dir) for i, o in zip(args.input, outputs)]
+    if len(jobs) == 1:
+        render_file(*jobs[0])
+    else:
+        # every file is independent, so render them in parallel processes
+        pool = multiprocessing.Pool()
+        try:
+            pool.starmap(render_file, jobs)
+        finally:
+            pool.close()
+            pool.join()
 
 if __name__ == "__main__":
     sys.exit(main())